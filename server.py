@@ -1,18 +1,69 @@
-from typing import Dict, Any, Optional, List
-from fastmcp import FastMCP, tool, Resource
+import asyncio
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, List, Iterator
+from fastmcp import FastMCP, tool, Resource, Context
 
 from tools.extract_metadata import extract_metadata
 from tools.classify_document import classify_document
 from tools.parse_pricing import parse_pricing
 from tools.brand_infer import infer_brand
 from tools.compile_html import compile_html
+from tools.sandbox import run_sandboxed
+from tools.document_store import get_store
+from tools.jobs import get_job_manager
 
 
 mcp = FastMCP("tri_tender_core_mcp")
 
 
+def _upload_error(exc: Exception) -> Dict[str, Any]:
+    return {
+        "ok": False,
+        "error": "Failed to read upload: %s" % (exc,),
+        "error_type": "error",
+    }
+
+
+def _classify_upload(path: str) -> str:
+    store = get_store()
+    try:
+        doc = store.checkout(path)
+    except OSError:
+        return classify_document(path, head=b"")
+    try:
+        return classify_document(doc.path, head=doc.head(4096))
+    finally:
+        store.release(doc)
+
+
+def _run_on_upload(func: Any, path: str, *args: Any) -> Any:
+    """
+    Run ``func`` in the sandbox against the shared local copy of an upload,
+    so every tool reads the upload's original location at most once.
+    """
+    store = get_store()
+    try:
+        doc = store.checkout(path)
+    except OSError as exc:
+        return _upload_error(exc)
+    try:
+        return run_sandboxed(func, doc.path, *args)
+    finally:
+        store.release(doc)
+
+
+@contextmanager
+def _upload_args(path: str, *args: Any) -> Iterator[tuple]:
+    """
+    Yield job arguments with the upload replaced by its shared local copy,
+    holding the copy for as long as the job runs.
+    """
+    with get_store().acquire(path) as doc:
+        yield (doc.path,) + args
+
+
 @tool
-def detect_document(file: Resource) -> str:
+async def detect_document(file: Resource) -> str:
     """
     Identify the type of tender-related document.
 
@@ -25,11 +76,11 @@ def detect_document(file: Resource) -> str:
     - "compliance_document"
     - "unknown"
     """
-    return classify_document(file.path)
+    return await asyncio.to_thread(_classify_upload, file.path)
 
 
 @tool
-def extract_tender_metadata(file: Resource) -> Dict[str, Any]:
+async def extract_tender_metadata(file: Resource) -> Dict[str, Any]:
     """
     Extract core tender metadata from the uploaded document.
 
@@ -41,12 +92,15 @@ def extract_tender_metadata(file: Resource) -> Dict[str, Any]:
     - summary
     - raw_text_excerpt
     - detected_sections (list of {name, snippet})
+
+    Runs in a sandboxed worker off the event loop; on timeout or memory
+    exhaustion returns {"ok": False, "error", "error_type"} instead.
     """
-    return extract_metadata(file.path)
+    return await asyncio.to_thread(_run_on_upload, extract_metadata, file.path)
 
 
 @tool
-def pricing_engine(file: Resource, user_inputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+async def pricing_engine(file: Resource, user_inputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     """
     Parse a pricing schedule (XLS/XLSX/CSV) and return a structured pricing model.
 
@@ -54,14 +108,17 @@ def pricing_engine(file: Resource, user_inputs: Optional[Dict[str, Any]] = None)
     - currency (e.g. "ZAR")
     - default_mark_up (e.g. 0.25)
     - rounding (e.g. 2)
+
+    Runs in a sandboxed worker off the event loop; on timeout or memory
+    exhaustion returns {"ok": False, "error", "error_type"} instead.
     """
     if user_inputs is None:
         user_inputs = {}
-    return parse_pricing(file.path, user_inputs)
+    return await asyncio.to_thread(_run_on_upload, parse_pricing, file.path, user_inputs)
 
 
 @tool
-def detect_brand(file: Resource) -> Dict[str, Any]:
+async def detect_brand(file: Resource) -> Dict[str, Any]:
     """
     Infer basic brand styling from a logo or a tender PDF.
 
@@ -72,8 +129,11 @@ def detect_brand(file: Resource) -> Dict[str, Any]:
     - accent_color
     - palette (list of hex)
     - notes
+
+    Runs in a sandboxed worker off the event loop; on timeout or memory
+    exhaustion returns {"ok": False, "error", "error_type"} instead.
     """
-    return infer_brand(file.path)
+    return await asyncio.to_thread(_run_on_upload, infer_brand, file.path)
 
 
 @tool
@@ -92,6 +152,90 @@ def compile_output(documents: List[Any], brand: Optional[Dict[str, Any]] = None,
     return compile_html(documents, brand, pricing)
 
 
+JOB_TOOLS = {
+    "extract_tender_metadata": extract_metadata,
+    "pricing_engine": parse_pricing,
+}
+
+
+@tool
+def submit_job(tool_name: str, file: Resource, user_inputs: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Start a long-running tool in the background and return immediately.
+
+    tool_name: "extract_tender_metadata" or "pricing_engine"
+    user_inputs: same as pricing_engine (ignored for metadata)
+
+    Returns {"ok", "job_id", "state"}. Follow up with job_status(),
+    wait_for_job() or job_result().
+    """
+    func = JOB_TOOLS.get(tool_name)
+    if func is None:
+        return {
+            "ok": False,
+            "error": "Unsupported job tool: %s (expected one of %s)" % (tool_name, ", ".join(sorted(JOB_TOOLS))),
+        }
+    extra = () if tool_name == "extract_tender_metadata" else (user_inputs or {},)
+    job_id = get_job_manager().submit(
+        tool_name,
+        func,
+        file.path,
+        *extra,
+        open_args=lambda: _upload_args(file.path, *extra)
+    )
+    return {"ok": True, "job_id": job_id, "state": "queued"}
+
+
+@tool
+def job_status(job_id: str, items_offset: int = 0, items_limit: int = 500) -> Dict[str, Any]:
+    """
+    Poll a background job.
+
+    Returns:
+    - state ("queued", "running", "done" or "failed")
+    - done / total (pages read or rows parsed so far)
+    - partial (results available so far, e.g. raw_text_excerpt or items;
+      list values are paged with items_offset / items_limit)
+    - partial_counts (full length of each paged list)
+    - error
+    """
+    return get_job_manager().status(job_id, partial_offset=items_offset, partial_limit=items_limit)
+
+
+@tool
+def job_result(job_id: str) -> Dict[str, Any]:
+    """
+    Fetch a background job's result.
+
+    Once the job has finished, "result" holds the same payload the
+    synchronous tool would have returned; until then this is job_status().
+    """
+    return get_job_manager().result(job_id)
+
+
+@tool
+async def wait_for_job(job_id: str, ctx: Context, timeout: float = 600.0) -> Dict[str, Any]:
+    """
+    Wait for a background job, streaming its progress as MCP progress
+    notifications, and return job_result() when it finishes or
+    job_status() if the timeout (seconds) expires first.
+    """
+    manager = get_job_manager()
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    last = None
+    while True:
+        status = manager.status(job_id, include_partial=False)
+        if not status.get("ok") or status["state"] in ("done", "failed"):
+            return manager.result(job_id)
+        if (status["done"], status["total"]) != last:
+            last = (status["done"], status["total"])
+            await ctx.report_progress(status["done"], status["total"])
+        if loop.time() >= deadline:
+            return manager.status(job_id)
+        await asyncio.sleep(0.5)
+
+
 if __name__ == "__main__":
     # Local dev entry point
     mcp.run()
@@ -0,0 +1,118 @@
+import os
+import shutil
+import threading
+
+import pytest
+
+import tools.document_store
+from tools.document_store import HEAD_BYTES, DocumentStore
+
+
+def _write(path, data):
+    with open(str(path), "wb") as f:
+        f.write(data)
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = DocumentStore(cache_dir=str(tmp_path))
+    yield s
+    s.close()
+
+
+def test_local_copy_keeps_name_and_content(tmp_path, store):
+    data = b"x" * (HEAD_BYTES + 100)
+    path = _write(tmp_path / "Pricing_Schedule.xlsx", data)
+    with store.acquire(path) as doc:
+        assert doc.path != path
+        assert os.path.basename(doc.path) == "Pricing_Schedule.xlsx"
+        with open(doc.path, "rb") as f:
+            assert f.read() == data
+        assert doc.size == len(data)
+        assert doc.head(4) == b"xxxx"
+        assert doc.head(HEAD_BYTES + 10) == data[:HEAD_BYTES + 10]
+
+
+def test_upload_is_copied_once_and_shared(tmp_path, store, monkeypatch):
+    path = _write(tmp_path / "tender.pdf", b"%PDF-1.4")
+    copies = []
+    real_copyfile = shutil.copyfile
+
+    def _counting_copyfile(src, dst):
+        copies.append(src)
+        return real_copyfile(src, dst)
+
+    monkeypatch.setattr(tools.document_store.shutil, "copyfile", _counting_copyfile)
+    with store.acquire(path) as first:
+        with store.acquire(path) as second:
+            assert first is second
+            assert first.refcount == 2
+        assert first.refcount == 1
+    with store.acquire(path) as again:
+        assert again is first
+    assert copies == [os.path.abspath(path)]
+
+
+def test_concurrent_checkouts_share_one_document(tmp_path, store):
+    path = _write(tmp_path / "tender.pdf", b"%PDF-1.4" * 1000)
+    docs = []
+    threads = [threading.Thread(target=lambda: docs.append(store.checkout(path))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len({id(d) for d in docs}) == 1
+    assert docs[0].refcount == 8
+    for doc in docs:
+        store.release(doc)
+    assert len(os.listdir(os.path.dirname(os.path.dirname(docs[0].path)))) == 1
+
+
+def test_changed_upload_is_copied_again(tmp_path, store):
+    path = _write(tmp_path / "a.txt", b"hello")
+    with store.acquire(path) as old:
+        _write(tmp_path / "a.txt", b"hello world")
+        os.utime(path, ns=(0, 0))
+        with store.acquire(path) as new:
+            assert new is not old
+            assert new.head(11) == b"hello world"
+        # The old copy stays until its last holder lets go.
+        assert os.path.exists(old.path)
+    assert not os.path.exists(old.path)
+
+
+def test_idle_documents_are_deleted(tmp_path):
+    store = DocumentStore(idle_seconds=0, cache_dir=str(tmp_path))
+    try:
+        path = _write(tmp_path / "a.txt", b"hello")
+        with store.acquire(path) as first:
+            pass
+        with store.acquire(path) as second:
+            assert second is not first
+        assert not os.path.exists(first.path)
+    finally:
+        store.close()
+
+
+def test_empty_file(tmp_path, store):
+    path = _write(tmp_path / "empty.bin", b"")
+    with store.acquire(path) as doc:
+        assert doc.size == 0
+        assert doc.head(4) == b""
+
+
+def test_missing_upload_leaves_nothing_behind(tmp_path, store):
+    with pytest.raises(OSError):
+        store.checkout(str(tmp_path / "missing.pdf"))
+    assert os.listdir(store._cache_dir) == []
+
+
+def test_close_removes_cache_dir(tmp_path):
+    store = DocumentStore(cache_dir=str(tmp_path))
+    path = _write(tmp_path / "a.txt", b"hello")
+    with store.acquire(path):
+        pass
+    cache_dir = store._cache_dir
+    store.close()
+    assert not os.path.exists(cache_dir)
@@ -0,0 +1,23 @@
+import pytest
+
+pypdf = pytest.importorskip("pypdf")
+pytest.importorskip("docx")
+
+from tools.extract_metadata import extract_metadata
+
+
+def test_progress_reports_each_pdf_page(tmp_path):
+    writer = pypdf.PdfWriter()
+    for _ in range(5):
+        writer.add_blank_page(width=200, height=200)
+    path = tmp_path / "tender.pdf"
+    with open(str(path), "wb") as f:
+        writer.write(f)
+
+    reports = []
+    result = extract_metadata(str(path), progress=lambda done, total, partial=None: reports.append((done, total, partial)))
+
+    # Only the first three pages are read for metadata.
+    assert [(done, total) for done, total, _ in reports] == [(1, 3), (2, 3), (3, 3)]
+    assert all("raw_text_excerpt" in partial for _, _, partial in reports)
+    assert result["file_name"] == "tender.pdf"
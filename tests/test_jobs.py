@@ -0,0 +1,220 @@
+import subprocess
+import sys
+import textwrap
+import time
+from contextlib import contextmanager
+
+from tools.jobs import JobManager
+from tools.sandbox import run_sandboxed
+
+
+def _work(n, progress=None):
+    for i in range(n):
+        progress(i + 1, n, {"items": [i], "last": i})
+    return {"ok": True, "n": n}
+
+
+def _stream_then_wait(n, seconds, progress=None):
+    for i in range(n):
+        progress(i + 1, n, {"items": [i]})
+    time.sleep(seconds)
+    return {"ok": True, "items": list(range(n))}
+
+
+def _fail(progress=None):
+    return {"ok": False, "error": "unreadable"}
+
+
+def _sleep(seconds, progress=None):
+    time.sleep(seconds)
+    return {"ok": True}
+
+
+def _echo(value):
+    return value
+
+
+def _wait(manager, job_id, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = manager.status(job_id)
+        if status["state"] in ("done", "failed"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError("job %s did not finish" % (job_id,))
+
+
+def _wait_for(predicate, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return
+        time.sleep(0.05)
+    raise AssertionError("condition not met")
+
+
+def test_job_completes_and_drops_partials():
+    manager = JobManager()
+    try:
+        job_id = manager.submit("work", _work, 3)
+        assert manager.status(job_id)["state"] in ("queued", "running")
+
+        status = _wait(manager, job_id)
+        assert status["state"] == "done"
+        assert (status["done"], status["total"]) == (3, 3)
+        assert status["partial"] == {}
+        assert manager.result(job_id)["result"] == {"ok": True, "n": 3}
+    finally:
+        manager.shutdown()
+
+
+def test_partial_items_are_merged_and_paged():
+    manager = JobManager()
+    try:
+        job_id = manager.submit("stream", _stream_then_wait, 5, 2)
+        _wait_for(lambda: manager.status(job_id)["done"] == 5)
+
+        status = manager.status(job_id)
+        assert status["partial"]["items"] == [0, 1, 2, 3, 4]
+        assert status["partial_counts"] == {"items": 5}
+
+        page = manager.status(job_id, partial_offset=1, partial_limit=2)
+        assert page["partial"]["items"] == [1, 2]
+        assert page["partial_counts"] == {"items": 5}
+    finally:
+        manager.shutdown()
+
+
+def test_failed_result_marks_job_failed():
+    manager = JobManager()
+    try:
+        job_id = manager.submit("fail", _fail)
+        status = _wait(manager, job_id)
+        assert status["state"] == "failed"
+        assert status["error"] == "unreadable"
+    finally:
+        manager.shutdown()
+
+
+def test_job_uses_its_own_timeout():
+    manager = JobManager(timeout=0.5)
+    try:
+        job_id = manager.submit("sleep", _sleep, 5)
+        status = _wait(manager, job_id)
+        assert status["state"] == "failed"
+        assert manager.result(job_id)["result"]["error_type"] == "timeout"
+    finally:
+        manager.shutdown()
+
+
+def test_jobs_do_not_occupy_synchronous_workers():
+    manager = JobManager(max_workers=1)
+    try:
+        job_id = manager.submit("sleep", _sleep, 3)
+        _wait_for(lambda: manager.status(job_id)["state"] == "running")
+        assert run_sandboxed(_echo, 1, timeout=2) == 1
+    finally:
+        manager.shutdown()
+
+
+def test_exception_in_runner_marks_job_failed(monkeypatch):
+    manager = JobManager()
+
+    def _boom(*args, **kwargs):
+        raise RuntimeError("pipe broke")
+
+    monkeypatch.setattr(manager._pool, "run", _boom)
+    try:
+        job_id = manager.submit("work", _work, 1)
+        status = _wait(manager, job_id)
+        assert status["state"] == "failed"
+        assert "pipe broke" in status["error"]
+        assert manager.result(job_id)["result"]["ok"] is False
+    finally:
+        manager.shutdown()
+
+
+def test_shutdown_cancels_queued_and_kills_running_jobs():
+    manager = JobManager(max_workers=1)
+    running = manager.submit("sleep", _sleep, 30)
+    queued = [manager.submit("sleep", _sleep, 30) for _ in range(2)]
+    _wait_for(lambda: manager.status(running)["state"] == "running")
+
+    started = time.monotonic()
+    manager.shutdown()
+    assert _wait(manager, running, timeout=5)["state"] == "failed"
+    for job_id in queued:
+        assert "cancelled" in manager.status(job_id)["error"]
+    assert time.monotonic() - started < 5
+
+    late = manager.submit("sleep", _sleep, 1)
+    assert manager.status(late)["state"] == "failed"
+
+
+def test_pending_jobs_do_not_delay_interpreter_exit():
+    script = textwrap.dedent(
+        """
+        import time
+        from tools.jobs import get_job_manager
+        from tests.test_jobs import _sleep
+
+        manager = get_job_manager()
+        ids = [manager.submit("sleep", _sleep, 30) for _ in range(3)]
+        while manager.status(ids[0])["state"] != "running":
+            time.sleep(0.05)
+        """
+    )
+    started = time.monotonic()
+    subprocess.run([sys.executable, "-c", script], check=True, timeout=30)
+    assert time.monotonic() - started < 10
+
+
+def test_open_args_wraps_the_run_and_is_skipped_when_cancelled():
+    manager = JobManager(max_workers=1)
+    events = []
+
+    @contextmanager
+    def _args(name, *args):
+        events.append("enter " + name)
+        try:
+            yield args
+        finally:
+            events.append("exit " + name)
+
+    try:
+        done = manager.submit("work", _work, 0, open_args=lambda: _args("done", 2))
+        assert manager.result(_wait(manager, done)["job_id"])["result"] == {"ok": True, "n": 2}
+        assert events == ["enter done", "exit done"]
+
+        running = manager.submit("sleep", _sleep, 0, open_args=lambda: _args("running", 30))
+        queued = manager.submit("sleep", _sleep, 0, open_args=lambda: _args("queued", 30))
+        _wait_for(lambda: manager.status(running)["state"] == "running")
+    finally:
+        manager.shutdown()
+    _wait_for(lambda: len(events) == 4)
+    assert events[2:] == ["enter running", "exit running"]
+    assert manager.status(queued)["state"] == "failed"
+
+
+def test_failing_open_args_marks_job_failed():
+    manager = JobManager()
+
+    def _missing():
+        raise FileNotFoundError("upload gone")
+
+    try:
+        job_id = manager.submit("work", _work, 1, open_args=_missing)
+        status = _wait(manager, job_id)
+        assert status["state"] == "failed"
+        assert "upload gone" in status["error"]
+    finally:
+        manager.shutdown()
+
+
+def test_unknown_job():
+    manager = JobManager()
+    try:
+        assert manager.status("missing")["ok"] is False
+        assert manager.result("missing")["ok"] is False
+    finally:
+        manager.shutdown()
@@ -0,0 +1,28 @@
+import pytest
+
+pytest.importorskip("pandas")
+
+from tools.parse_pricing import PROGRESS_EVERY_ROWS, parse_pricing
+
+
+def test_progress_reports_loading_parsing_and_item_chunks(tmp_path):
+    rows = PROGRESS_EVERY_ROWS * 2 + 200
+    path = tmp_path / "pricing.csv"
+    with open(str(path), "w") as f:
+        f.write("Description,Qty,Rate\n")
+        for i in range(rows):
+            f.write("item %d,%d,1.5\n" % (i, i + 1))
+
+    reports = []
+    result = parse_pricing(str(path), {}, progress=lambda done, total, partial=None: reports.append((done, total, partial)))
+
+    assert reports[0] == (0, None, {"phase": "loading"})
+    assert reports[1][:2] == (0, rows)
+    assert reports[1][2]["phase"] == "parsing"
+    assert [r[0] for r in reports[2:]] == [PROGRESS_EVERY_ROWS, PROGRESS_EVERY_ROWS * 2, rows]
+
+    streamed = []
+    for _, _, partial in reports[2:]:
+        streamed.extend(partial["items"])
+    assert [i["row_index"] for i in streamed] == [i["row_index"] for i in result["items"]]
+    assert streamed == result["items"]
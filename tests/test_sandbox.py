@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+
+import pytest
+
+from tools.sandbox import SandboxPool, resource
+
+
+def _pid():
+    return os.getpid()
+
+
+def _echo(value):
+    return {"ok": True, "value": value}
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return {"ok": True}
+
+
+def _allocate(mb):
+    return len(bytearray(mb * 1024 * 1024))
+
+
+def _raise():
+    raise ValueError("bad input")
+
+
+def _exit():
+    os._exit(3)
+
+
+def _explode():
+    raise ImportError("cannot load job")
+
+
+class _Unloadable(object):
+    def __reduce__(self):
+        return (_explode, ())
+
+
+@pytest.fixture
+def pool():
+    p = SandboxPool(max_workers=1, timeout=5, memory_limit_mb=256, max_jobs_per_worker=2)
+    yield p
+    p.shutdown()
+
+
+def test_returns_result(pool):
+    assert pool.run(_echo, 1) == {"ok": True, "value": 1}
+
+
+def test_recycles_workers_after_max_jobs(pool):
+    first, second, third = pool.run(_pid), pool.run(_pid), pool.run(_pid)
+    assert first == second
+    assert third != first
+
+
+def test_timeout(pool):
+    result = pool.run(_sleep, 10, timeout=0.5)
+    assert result["ok"] is False
+    assert result["error_type"] == "timeout"
+    assert pool.run(_echo, 2)["value"] == 2
+
+
+@pytest.mark.skipif(resource is None, reason="RLIMIT_AS not available")
+def test_out_of_memory(pool):
+    result = pool.run(_allocate, 1024)
+    assert result["error_type"] == "out_of_memory"
+    assert pool.run(_allocate, 16) == 16 * 1024 * 1024
+
+
+def test_job_exception(pool):
+    result = pool.run(_raise)
+    assert result["error_type"] == "error"
+    assert "bad input" in result["error"]
+
+
+def test_worker_crash(pool):
+    assert pool.run(_exit)["error_type"] == "worker_crashed"
+    assert pool.run(_echo, 3)["value"] == 3
+
+
+def test_unpicklable_job_keeps_worker():
+    pool = SandboxPool(max_workers=1, timeout=5, max_jobs_per_worker=10)
+    try:
+        before = pool.run(_pid)
+        result = pool.run(_echo, _Unloadable())
+        assert result["error_type"] == "error"
+        assert "cannot load job" in result["error"]
+        assert pool.run(_pid) == before
+    finally:
+        pool.shutdown()
+
+
+def test_waiting_for_a_worker_counts_against_timeout(pool):
+    blocker = threading.Thread(target=pool.run, args=(_sleep, 2))
+    blocker.start()
+    time.sleep(0.2)
+    try:
+        started = time.monotonic()
+        result = pool.run(_echo, 4, timeout=0.5)
+        assert result["error_type"] == "busy"
+        assert time.monotonic() - started < 1.5
+    finally:
+        blocker.join()
+
+
+def _report(n, progress=None):
+    for i in range(n):
+        progress(i + 1, n, {"items": [i]})
+    return n
+
+
+def test_progress_reports(pool):
+    reports = []
+    assert pool.run(_report, 3, on_progress=reports.append) == 3
+    assert [r["done"] for r in reports] == [1, 2, 3]
+    assert reports[-1]["partial"] == {"items": [2]}
+
+
+def test_failing_progress_callback_keeps_worker():
+    pool = SandboxPool(max_workers=1, timeout=5, max_jobs_per_worker=10)
+
+    def _broken(report):
+        raise RuntimeError("listener gone")
+
+    try:
+        before = pool.run(_pid)
+        assert pool.run(_report, 2, on_progress=_broken) == 2
+        assert pool.run(_pid) == before
+    finally:
+        pool.shutdown()
+
+
+def _map_anonymous(mb):
+    import mmap
+
+    return len(mmap.mmap(-1, mb * 1024 * 1024))
+
+
+@pytest.mark.skipif(resource is None, reason="RLIMIT_AS not available")
+def test_enomem_is_reported_as_out_of_memory(pool):
+    assert pool.run(_map_anonymous, 2048)["error_type"] == "out_of_memory"
@@ -30,11 +30,12 @@ def _guess_from_filename(path: str) -> Optional[str]:
     return None
 
 
-def classify_document(path: str) -> str:
+def classify_document(path: str, head: Optional[bytes] = None) -> str:
     """
     Very light-weight heuristic classifier for tender documents.
 
-    Uses filename, mime type and a small keyword scan on the first 4 KB.
+    Uses filename, mime type and a small keyword scan on the first 4 KB,
+    taken from ``head`` when the caller already has those bytes.
     """
     # 1) filename hints
     guess = _guess_from_filename(path)
@@ -49,13 +50,15 @@ def classify_document(path: str) -> str:
 
     # 3) content keywords (first few KB as text)
     try:
-        with open(path, "rb") as f:
-            head = f.read(4096).decode(errors="ignore").lower()
+        if head is None:
+            with open(path, "rb") as f:
+                head = f.read(4096)
+        text = head[:4096].decode(errors="ignore").lower()
     except Exception:
-        head = ""
+        text = ""
 
     for label, keywords in KEYWORDS_MAP.items():
-        if any(k in head for k in keywords):
+        if any(k in text for k in keywords):
             return label
 
     return "unknown"
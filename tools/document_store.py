@@ -0,0 +1,161 @@
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Iterator, Tuple
+
+
+DEFAULT_IDLE_SECONDS = float(os.environ.get("TRI_TENDER_DOC_IDLE_SECONDS", "300"))
+DEFAULT_CACHE_DIR = os.environ.get("TRI_TENDER_DOC_CACHE_DIR") or None
+HEAD_BYTES = 16384
+
+
+class Document(object):
+    """
+    One upload, read once from where it was uploaded into a local copy.
+
+    - ``path``: the local copy, named like the upload so that extension
+      and filename heuristics still work; sandboxed tools read this
+    - ``head(n)``: the first ``n`` bytes (up to HEAD_BYTES are kept in
+      memory, so classification never touches the disk again)
+    """
+
+    def __init__(self, source_path: str, cache_dir: str) -> None:
+        self.source_path = source_path
+        st = os.stat(source_path)
+        self.signature = (st.st_size, st.st_mtime_ns)  # type: Tuple[int, int]
+        self.refcount = 0
+        self.last_used = time.monotonic()
+        self.stale = False
+
+        self._dir = tempfile.mkdtemp(dir=cache_dir)
+        self.path = os.path.join(self._dir, os.path.basename(source_path))
+        try:
+            # copyfile uses sendfile()/copy_file_range() where available,
+            # so the upload is streamed without buffering it in Python.
+            shutil.copyfile(source_path, self.path)
+            with open(self.path, "rb") as f:
+                self._head = f.read(HEAD_BYTES)
+        except BaseException:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            raise
+        self.size = os.path.getsize(self.path)
+
+    def head(self, n: int) -> bytes:
+        if n <= len(self._head):
+            return self._head[:n]
+        with open(self.path, "rb") as f:
+            return f.read(n)
+
+    def close(self) -> None:
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+
+class DocumentStore(object):
+    """
+    Reference-counted cache of local upload copies, keyed by upload path.
+
+    ``checkout(path)`` returns the shared ``Document`` and ``release(doc)``
+    gives it back; ``acquire(path)`` wraps the pair for a ``with`` block.
+    Documents nobody holds are deleted once idle for ``idle_seconds``. An
+    upload whose size or mtime changed is copied again; the old copy is
+    deleted when its last holder releases it.
+    """
+
+    def __init__(self, idle_seconds: float = DEFAULT_IDLE_SECONDS, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> None:
+        self.idle_seconds = idle_seconds
+        self._cache_dir = tempfile.mkdtemp(prefix="tri-tender-docs-", dir=cache_dir)
+        self._lock = threading.Lock()
+        self._docs = {}  # type: Dict[str, Document]
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_seconds
+        for path, doc in list(self._docs.items()):
+            if doc.refcount == 0 and doc.last_used <= cutoff:
+                del self._docs[path]
+                doc.close()
+
+    def _lookup(self, key: str) -> Optional[Document]:
+        doc = self._docs.get(key)
+        if doc is not None:
+            st = os.stat(key)
+            if doc.signature != (st.st_size, st.st_mtime_ns):
+                del self._docs[key]
+                doc.stale = True
+                if doc.refcount == 0:
+                    doc.close()
+                doc = None
+        return doc
+
+    def checkout(self, path: str) -> Document:
+        key = os.path.abspath(path)
+        with self._lock:
+            self._evict_idle()
+            doc = self._lookup(key)
+            if doc is not None:
+                doc.refcount += 1
+                return doc
+
+        # Copy outside the lock so one large upload does not stall others.
+        fresh = Document(key, self._cache_dir)
+        with self._lock:
+            doc = self._lookup(key)
+            if doc is None:
+                doc = self._docs[key] = fresh
+            else:
+                fresh.close()
+            doc.refcount += 1
+            return doc
+
+    def release(self, doc: Document) -> None:
+        with self._lock:
+            doc.refcount -= 1
+            doc.last_used = time.monotonic()
+            if doc.stale and doc.refcount == 0:
+                doc.close()
+
+    @contextmanager
+    def acquire(self, path: str) -> Iterator[Document]:
+        doc = self.checkout(path)
+        try:
+            yield doc
+        finally:
+            self.release(doc)
+
+    def clear(self) -> None:
+        with self._lock:
+            docs, self._docs = self._docs, {}
+            for doc in docs.values():
+                doc.stale = True
+                if doc.refcount == 0:
+                    doc.close()
+
+    def close(self) -> None:
+        """
+        Delete every local copy and the cache directory itself.
+        """
+        self.clear()
+        shutil.rmtree(self._cache_dir, ignore_errors=True)
+
+
+_store = None  # type: Optional[DocumentStore]
+_store_lock = threading.Lock()
+
+
+def get_store() -> DocumentStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = DocumentStore()
+            atexit.register(_store.close)
+        return _store
+
+
+def open_document(path: str):
+    """
+    Shortcut for ``get_store().acquire(path)``.
+    """
+    return get_store().acquire(path)
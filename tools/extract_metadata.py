@@ -1,19 +1,22 @@
 import os
 import re
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Callable
 
 from pypdf import PdfReader
 from docx import Document as DocxDocument
 
 
-def _read_text_from_pdf(path: str, max_pages: int = 3) -> str:
+def _read_text_from_pdf(path: str, max_pages: int = 3, progress: Optional[Callable[..., None]] = None) -> str:
     reader = PdfReader(path)
+    selected = reader.pages[:max_pages]
     pages = []
-    for i, page in enumerate(reader.pages[:max_pages]):
+    for i, page in enumerate(selected):
         try:
             pages.append(page.extract_text() or "")
         except Exception:
-            continue
+            pass
+        if progress is not None:
+            progress(i + 1, len(selected), {"raw_text_excerpt": "\n".join(pages)[:4000]})
     return "\n".join(pages)
 
 
@@ -37,17 +40,20 @@ def _extract_field(patterns, text, max_len: int = 200) -> Optional[str]:
     return None
 
 
-def extract_metadata(path: str) -> Dict[str, Any]:
+def extract_metadata(path: str, progress: Optional[Callable[..., None]] = None) -> Dict[str, Any]:
     """
     Extract high-level tender metadata using regex heuristics.
 
     This is intentionally conservative and safe for production use,
     and can be refined later with more advanced NLP or custom rules.
+
+    If given, progress(done, total, partial) is called as PDF pages are
+    read, with the text extracted so far as a partial result.
     """
     ext = os.path.splitext(path)[1].lower()
 
     if ext == ".pdf":
-        text = _read_text_from_pdf(path)
+        text = _read_text_from_pdf(path, progress=progress)
     elif ext in {".docx"}:
         text = _read_text_from_docx(path)
     else:
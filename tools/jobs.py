@@ -0,0 +1,246 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import nullcontext
+from typing import Dict, Any, Optional, List, Callable, ContextManager
+
+from tools.sandbox import SandboxPool
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_TTL = float(os.environ.get("TRI_TENDER_JOB_TTL", "3600"))
+DEFAULT_JOB_TIMEOUT = float(os.environ.get("TRI_TENDER_JOB_TIMEOUT", "1800"))
+DEFAULT_JOB_WORKERS = int(os.environ.get("TRI_TENDER_JOB_WORKERS", "2"))
+DEFAULT_PARTIAL_LIMIT = 500
+
+
+def _failure(message: str) -> Dict[str, Any]:
+    return {"ok": False, "error": message, "error_type": "error"}
+
+
+class _Job(object):
+    def __init__(self, tool_name: str) -> None:
+        self.id = uuid.uuid4().hex
+        self.tool = tool_name
+        self.state = "queued"
+        self.done = 0
+        self.total = None  # type: Optional[int]
+        self.partial = {}  # type: Dict[str, Any]
+        self.result = None  # type: Any
+        self.error = None  # type: Optional[str]
+        self.created_at = time.time()
+        self.finished_at = None  # type: Optional[float]
+
+    def finish(self, result: Any) -> None:
+        self.result = result
+        self.finished_at = time.time()
+        # The final result supersedes whatever was streamed so far.
+        self.partial = {}
+        if isinstance(result, dict) and result.get("ok") is False:
+            self.state = "failed"
+            self.error = result.get("error")
+        else:
+            self.state = "done"
+            if self.total is not None:
+                self.done = self.total
+
+    def snapshot(
+        self,
+        include_partial: bool = True,
+        partial_offset: int = 0,
+        partial_limit: int = DEFAULT_PARTIAL_LIMIT,
+    ) -> Dict[str, Any]:
+        status = {
+            "ok": True,
+            "job_id": self.id,
+            "tool": self.tool,
+            "state": self.state,
+            "done": self.done,
+            "total": self.total,
+            "error": self.error,
+        }
+        if include_partial:
+            partial = {}  # type: Dict[str, Any]
+            counts = {}  # type: Dict[str, int]
+            for key, value in self.partial.items():
+                if isinstance(value, list):
+                    partial[key] = value[partial_offset:partial_offset + partial_limit]
+                    counts[key] = len(value)
+                else:
+                    partial[key] = value
+            status["partial"] = partial
+            status["partial_counts"] = counts
+        return status
+
+
+class JobManager(object):
+    """
+    Run long tool calls in the background and track their progress.
+
+    Jobs execute in a sandbox pool of their own, with the usual memory
+    cap but a longer ``timeout``, so long jobs never occupy the workers
+    that serve synchronous tool calls. Progress reports from the worker
+    update ``done``/``total`` and merge into ``partial``: list values
+    (e.g. pricing items) are appended, anything else replaces the
+    previous value. ``partial`` is dropped once the job finishes, and
+    finished jobs are forgotten ``ttl`` seconds after completion.
+
+    Jobs are run by daemon threads, so a pending queue never holds up
+    interpreter exit; ``shutdown()`` cancels queued jobs and kills the
+    running ones.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_JOB_WORKERS,
+        ttl: float = DEFAULT_JOB_TTL,
+        timeout: float = DEFAULT_JOB_TIMEOUT,
+    ) -> None:
+        self.ttl = ttl
+        self.timeout = timeout
+        self._pool = SandboxPool(max_workers=max_workers, timeout=timeout)
+        self._lock = threading.Lock()
+        self._jobs = {}  # type: Dict[str, _Job]
+        self._queue = queue.Queue()  # type: queue.Queue
+        self._closed = False
+        self._threads = []  # type: List[threading.Thread]
+        for i in range(self._pool.max_workers):
+            thread = threading.Thread(target=self._serve, name="tri-tender-job-%d" % (i,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _evict_expired(self) -> None:
+        cutoff = time.time() - self.ttl
+        for job_id in [j.id for j in self._jobs.values() if j.finished_at and j.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def _on_progress(self, job: _Job, report: Dict[str, Any]) -> None:
+        with self._lock:
+            job.done = report.get("done") or 0
+            job.total = report.get("total")
+            for key, value in (report.get("partial") or {}).items():
+                if isinstance(value, list):
+                    job.partial.setdefault(key, []).extend(value)
+                else:
+                    job.partial[key] = value
+
+    def _serve(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            self._run(*item)
+
+    def _run(
+        self,
+        job: _Job,
+        func: Callable[..., Any],
+        args: tuple,
+        open_args: Optional[Callable[[], ContextManager[tuple]]],
+    ) -> None:
+        with self._lock:
+            if job.state != "queued":
+                return
+            job.state = "running"
+
+        try:
+            with (open_args() if open_args is not None else nullcontext(args)) as run_args:
+                result = self._pool.run(
+                    func,
+                    *run_args,
+                    on_progress=lambda report: self._on_progress(job, report)
+                )
+        except Exception as exc:
+            logger.exception("Background job %s failed", job.id)
+            result = _failure("%s: %s" % (type(exc).__name__, exc))
+
+        with self._lock:
+            job.finish(result)
+
+    def submit(
+        self,
+        tool_name: str,
+        func: Callable[..., Any],
+        *args: Any,
+        open_args: Optional[Callable[[], ContextManager[tuple]]] = None
+    ) -> str:
+        """
+        Queue ``func(*args, progress=...)`` and return its job id at once.
+
+        If given, ``open_args()`` must return a context manager yielding
+        the arguments to use instead of ``args``. It is entered in the
+        runner thread just before the job starts and exited when it ends,
+        so slow preparation (e.g. copying an upload) never delays submit
+        and is skipped for cancelled jobs.
+        """
+        job = _Job(tool_name)
+        with self._lock:
+            self._evict_expired()
+            self._jobs[job.id] = job
+            if self._closed:
+                job.finish(_failure("Job manager has been shut down."))
+                return job.id
+        self._queue.put((job, func, args, open_args))
+        return job.id
+
+    def status(
+        self,
+        job_id: str,
+        include_partial: bool = True,
+        partial_offset: int = 0,
+        partial_limit: int = DEFAULT_PARTIAL_LIMIT,
+    ) -> Dict[str, Any]:
+        """
+        Return the job's state and progress. List-valued partial results
+        are paged with ``partial_offset``/``partial_limit``;
+        ``partial_counts`` gives their full lengths.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return {"ok": False, "error": "Unknown job id: %s" % (job_id,)}
+            return job.snapshot(include_partial, max(0, partial_offset), max(0, partial_limit))
+
+    def result(self, job_id: str) -> Dict[str, Any]:
+        """
+        Return the finished job's result, or its status while it runs.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return {"ok": False, "error": "Unknown job id: %s" % (job_id,)}
+            status = job.snapshot(include_partial=job.finished_at is None)
+            if job.finished_at is not None:
+                status["result"] = job.result
+            return status
+
+    def shutdown(self) -> None:
+        """
+        Cancel queued jobs, kill running ones and stop the runner threads.
+        """
+        with self._lock:
+            self._closed = True
+            for job in self._jobs.values():
+                if job.state == "queued":
+                    job.finish(_failure("Job cancelled: job manager shut down."))
+        self._pool.shutdown()
+        for _ in self._threads:
+            self._queue.put(None)
+
+
+_manager = None  # type: Optional[JobManager]
+_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+            atexit.register(_manager.shutdown)
+        return _manager
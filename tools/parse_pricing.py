@@ -1,5 +1,5 @@
 import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Callable
 
 import pandas as pd
 
@@ -15,7 +15,14 @@ def _load_table(path: str) -> pd.DataFrame:
     return pd.read_excel(path)
 
 
-def parse_pricing(path: str, user_inputs: Dict[str, Any]) -> Dict[str, Any]:
+PROGRESS_EVERY_ROWS = 500
+
+
+def parse_pricing(
+    path: str,
+    user_inputs: Dict[str, Any],
+    progress: Optional[Callable[..., None]] = None,
+) -> Dict[str, Any]:
     """
     Read a pricing schedule and surface it as a structured JSON payload
     that an LLM can reason about.
@@ -23,11 +30,20 @@ def parse_pricing(path: str, user_inputs: Dict[str, Any]) -> Dict[str, Any]:
     The goal is to be predictable rather than clever:
     - We do not guess too much.
     - We expose column names and raw values.
+
+    If given, progress(done, total, partial) is called with
+    partial["phase"] == "loading" before the file is read, then every
+    PROGRESS_EVERY_ROWS rows with partial["items"] holding only the items
+    parsed since the previous call. Reading the workbook itself is a
+    single pandas call, so no progress is reported while it runs.
     """
     currency = user_inputs.get("currency", "ZAR")
     default_mark_up = float(user_inputs.get("default_mark_up", 0.0))
     rounding = int(user_inputs.get("rounding", 2))
 
+    if progress is not None:
+        progress(0, None, {"phase": "loading"})
+
     try:
         df = _load_table(path)
     except Exception as exc:
@@ -48,7 +64,16 @@ def parse_pricing(path: str, user_inputs: Dict[str, Any]) -> Dict[str, Any]:
     total_col = next((c for c in df.columns if "total" in c.lower()), None)
 
     items = []
-    for idx, row in df.iterrows():
+    row_count = len(df)
+    reported = 0
+    if progress is not None:
+        progress(0, row_count, {"phase": "parsing", "column_names": list(df.columns)})
+
+    for pos, (idx, row) in enumerate(df.iterrows()):
+        if progress is not None and pos and pos % PROGRESS_EVERY_ROWS == 0:
+            progress(pos, row_count, {"items": items[reported:]})
+            reported = len(items)
+
         # Skip fully blank rows
         if row.isna().all():
             continue
@@ -90,6 +115,9 @@ def parse_pricing(path: str, user_inputs: Dict[str, Any]) -> Dict[str, Any]:
 
         items.append(item)
 
+    if progress is not None:
+        progress(row_count, row_count, {"items": items[reported:]})
+
     grand_total = round(
         sum(float(i.get("total", 0) or 0) for i in items),
         rounding,
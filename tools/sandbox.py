@@ -0,0 +1,303 @@
+import atexit
+import errno
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from typing import Dict, Any, Optional, List, Set, Callable
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows has no RLIMIT_AS
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = float(os.environ.get("TRI_TENDER_SANDBOX_TIMEOUT", "60"))
+DEFAULT_MEMORY_LIMIT_MB = int(os.environ.get("TRI_TENDER_SANDBOX_MEMORY_MB", "1024"))
+DEFAULT_MAX_WORKERS = int(os.environ.get("TRI_TENDER_SANDBOX_WORKERS", "2"))
+DEFAULT_MAX_JOBS_PER_WORKER = int(os.environ.get("TRI_TENDER_SANDBOX_MAX_JOBS", "50"))
+
+
+def _error(error_type: str, message: str) -> Dict[str, Any]:
+    return {
+        "ok": False,
+        "error": message,
+        "error_type": error_type,
+    }
+
+
+def _set_memory_limit(memory_limit_mb: Optional[int]) -> None:
+    if resource is None:
+        return
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if memory_limit_mb:
+        soft = memory_limit_mb * 1024 * 1024
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+    else:
+        soft = hard
+    resource.setrlimit(resource.RLIMIT_AS, (soft, hard))
+
+
+def _worker_main(conn) -> None:
+    """
+    Worker loop: receive (func, args, kwargs, memory_limit_mb, report)
+    jobs and send back ("ok", result), ("error", message) or
+    ("oom", message).
+
+    When ``report`` is set the job is called with a ``progress`` keyword
+    argument whose calls are relayed to the parent as ("progress", ...)
+    messages ahead of the final reply.
+
+    The memory cap is applied per job as a soft RLIMIT_AS, so the hard
+    limit stays untouched and later jobs may use a different cap.
+    """
+    def _progress(done: int, total: Optional[int] = None, partial: Optional[Dict[str, Any]] = None) -> None:
+        conn.send(("progress", {"done": done, "total": total, "partial": partial}))
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        except Exception as exc:
+            # The job arrived but could not be unpickled (e.g. an import
+            # error in the target module); report it and keep serving.
+            conn.send(("error", "Failed to load job: %s: %s" % (type(exc).__name__, exc)))
+            continue
+        if job is None:
+            break
+
+        func, args, kwargs, memory_limit_mb, report = job
+        if report:
+            kwargs["progress"] = _progress
+        try:
+            _set_memory_limit(memory_limit_mb)
+            reply = ("ok", func(*args, **kwargs))
+        except MemoryError:
+            reply = ("oom", "Job exceeded the %s MB memory cap." % (memory_limit_mb,))
+        except OSError as exc:
+            # mmap() and other syscalls report RLIMIT_AS as ENOMEM.
+            if exc.errno == errno.ENOMEM:
+                reply = ("oom", "Job exceeded the %s MB memory cap." % (memory_limit_mb,))
+            else:
+                reply = ("error", "%s: %s" % (type(exc).__name__, exc))
+        except Exception as exc:
+            reply = ("error", "%s: %s" % (type(exc).__name__, exc))
+        finally:
+            try:
+                _set_memory_limit(None)
+            except Exception:
+                pass
+
+        try:
+            conn.send(reply)
+        except MemoryError:
+            conn.send(("oom", "Job result exceeded the memory cap."))
+        except Exception as exc:
+            conn.send(("error", "Failed to send job result: %s" % (exc,)))
+
+
+class _Worker(object):
+    def __init__(self, ctx) -> None:
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs_done = 0
+
+    def is_alive(self) -> bool:
+        return self.process.is_alive()
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except Exception:
+            pass
+        self.process.join(1.0)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(1.0)
+        self.conn.close()
+
+
+class SandboxPool(object):
+    """
+    Run untrusted document parsing in recyclable worker processes.
+
+    Each job gets a wall-clock timeout and an RLIMIT_AS memory cap. A job
+    that times out or crashes takes down only its own worker, which is
+    replaced on the next call; healthy workers are recycled after
+    ``max_jobs_per_worker`` jobs to shed leaked memory.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        timeout: float = DEFAULT_TIMEOUT,
+        memory_limit_mb: Optional[int] = DEFAULT_MEMORY_LIMIT_MB,
+        max_jobs_per_worker: int = DEFAULT_MAX_JOBS_PER_WORKER,
+    ) -> None:
+        methods = multiprocessing.get_all_start_methods()
+        self._ctx = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.max_jobs_per_worker = max(1, max_jobs_per_worker)
+
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._lock = threading.Lock()
+        self._idle = []  # type: List[_Worker]
+        self._busy = set()  # type: Set[_Worker]
+        self._closed = False
+
+    def _checkout(self) -> _Worker:
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.is_alive():
+                    self._busy.add(worker)
+                    return worker
+                worker.kill()
+        worker = _Worker(self._ctx)
+        with self._lock:
+            self._busy.add(worker)
+        return worker
+
+    def _checkin(self, worker: _Worker) -> None:
+        worker.jobs_done += 1
+        if worker.jobs_done >= self.max_jobs_per_worker or not worker.is_alive():
+            worker.stop()
+            return
+        with self._lock:
+            if self._closed:
+                worker.stop()
+            else:
+                self._idle.append(worker)
+
+    def run(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        memory_limit_mb: Optional[int] = None,
+        on_progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+        **kwargs: Any
+    ) -> Any:
+        """
+        Run ``func(*args, **kwargs)`` in a worker and return its result.
+
+        ``func`` and its arguments must be picklable (module-level
+        functions and plain data). Failures are returned as a dict with
+        ``ok: False``, ``error`` and ``error_type`` set to one of
+        ``busy``, ``timeout``, ``out_of_memory``, ``worker_crashed`` or
+        ``error``. Time spent waiting for a free worker counts against
+        ``timeout``.
+
+        If ``on_progress`` is given, ``func`` must accept a ``progress``
+        callable; each ``progress(done, total, partial)`` call in the
+        worker invokes ``on_progress`` with a dict of those keys.
+        """
+        if self._closed:
+            return _error("error", "Sandbox pool has been shut down.")
+
+        timeout = self.timeout if timeout is None else timeout
+        memory_limit_mb = self.memory_limit_mb if memory_limit_mb is None else memory_limit_mb
+
+        # Waiting for a free worker counts against the job's time limit so
+        # that hostile uploads occupying every worker cannot stall callers.
+        deadline = time.monotonic() + timeout
+        if not self._slots.acquire(timeout=timeout):
+            return _error("busy", "No sandbox worker became free within the %ss time limit." % (timeout,))
+        worker = None  # type: Optional[_Worker]
+        try:
+            worker = self._checkout()
+            try:
+                worker.conn.send((func, args, kwargs, memory_limit_mb, on_progress is not None))
+            except Exception as exc:
+                worker.kill()
+                return _error("error", "Failed to submit job: %s" % (exc,))
+
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        worker.kill()
+                        return _error("timeout", "Job exceeded the %ss time limit." % (timeout,))
+                    if worker.conn.poll(min(remaining, 0.5)):
+                        status, payload = worker.conn.recv()
+                        if status != "progress":
+                            break
+                        if on_progress is not None:
+                            try:
+                                on_progress(payload)
+                            except Exception:
+                                # A broken listener must not orphan the worker.
+                                logger.exception("Sandbox progress callback failed")
+                        continue
+                    if not worker.is_alive():
+                        raise EOFError
+            except (EOFError, OSError):
+                worker.process.join(1.0)
+                code = worker.process.exitcode
+                worker.kill()
+                if self._closed:
+                    return _error("error", "Sandbox pool has been shut down.")
+                return _error("worker_crashed", "Worker process exited unexpectedly (exit code %s)." % (code,))
+            except Exception as exc:
+                # e.g. a result that cannot be unpickled in this process
+                worker.kill()
+                return _error("error", "Failed to read job result: %s: %s" % (type(exc).__name__, exc))
+
+            if status == "oom":
+                # A MemoryError can leave the worker heap fragmented; never reuse it.
+                worker.stop()
+                return _error("out_of_memory", payload)
+
+            self._checkin(worker)
+            if status == "ok":
+                return payload
+            return _error("error", payload)
+        finally:
+            with self._lock:
+                self._busy.discard(worker)
+            self._slots.release()
+
+    def shutdown(self) -> None:
+        """
+        Stop idle workers and kill busy ones; their callers get an error
+        straight away instead of waiting out the job timeout.
+        """
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            busy = list(self._busy)
+        for worker in idle:
+            worker.stop()
+        for worker in busy:
+            worker.process.kill()
+
+
+_pool = None  # type: Optional[SandboxPool]
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> SandboxPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SandboxPool()
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def run_sandboxed(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Convenience wrapper around the shared process-wide ``SandboxPool``.
+    """
+    return get_pool().run(func, *args, **kwargs)